@@ -0,0 +1,215 @@
+__version__ = '0.4.1'
+
+import keyword
+import re
+
+# python type of the value for each parameter type
+PARAM_PYTHON_TYPES = {
+    "string": str,
+    "dropdown": str,
+    "color": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+}
+
+# attributes of the generated classes that sections and parameters cannot use
+RESERVED_ATTRIBUTES = ("refresh", "update", "_names", "_section_classes", "_block_key")
+
+_class_cache = {}
+
+
+def attributeName(name):
+    """
+    Converts a section or parameter name to a valid attribute name.
+
+    :param name: The section or parameter name, e.g. "test string".
+    :type name: str
+    :return: The attribute name, e.g. "test_string".
+    :rtype: str
+    """
+    attribute = re.sub(r"\W", "_", name)
+    if not attribute or attribute[0].isdigit():
+        attribute = "_" + attribute
+    if keyword.iskeyword(attribute):
+        attribute += "_"
+    return attribute
+
+
+def resolveValue(info):
+    """
+    Resolves the value of a parameter the same way as JsonSettings.get.
+
+    :param info: The parameter properties.
+    :type info: dict
+    :return: The value, or None if the auto flag is set. Integer values of float parameters are converted to
+        float, any other value is returned unchanged.
+    :rtype: any
+    """
+    if info.get("auto", False):
+        return None
+    value = info.get("value", info.get("default", None))
+    if info.get("type") == "float" and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def attributeNames(names, kind):
+    """
+    Maps attribute names to section or parameter names.
+
+    :param names: The section or parameter names.
+    :type names: iterable of str
+    :param kind: "section" or "parameter", used in the error message.
+    :type kind: str
+    :return: The original name of each attribute name.
+    :rtype: dict
+    :raises ValueError: If two names map to the same attribute name, or a name maps to a reserved attribute.
+    """
+    attributes = {}
+    for name in names:
+        attribute = attributeName(name)
+        if attribute in RESERVED_ATTRIBUTES:
+            raise ValueError(f"The {kind} name {name!r} maps to the reserved attribute {attribute!r}")
+        if attribute in attributes:
+            raise ValueError(f"The {kind} names {attributes[attribute]!r} and {name!r} both map to the attribute "
+                             f"{attribute!r}")
+        attributes[attribute] = name
+    return attributes
+
+
+def generateAccessorClass(block, class_name="SettingsAccessor"):
+    """
+    Generates an accessor class for a settings block.
+
+    Every section becomes a ``__slots__`` class with one typed attribute per parameter, and the returned block
+    class has one attribute per section. Classes are cached by schema, so blocks with the same sections,
+    parameters and types share them.
+
+    :param block: The settings block, as returned by JsonSettings.load.
+    :type block: dict
+    :param class_name: The name of the generated block class.
+    :type class_name: str
+    :return: The generated block class.
+    :rtype: type
+    """
+    schema = (class_name,) + tuple(
+        (section, tuple((name, info.get("type", "string")) for name, info in params_dict.items()))
+        for section, params_dict in block.items()
+    )
+    if schema in _class_cache:
+        return _class_cache[schema]
+
+    section_classes = {}
+    for section, params_dict in block.items():
+        attributes = attributeNames(params_dict, "parameter")
+        section_classes[attributeName(section)] = type(
+            attributeName(section).title().replace("_", "") + "Section",
+            (),
+            {
+                "__slots__": tuple(attributes),
+                "__annotations__": {
+                    attribute: PARAM_PYTHON_TYPES.get(params_dict[name].get("type", "string"), object)
+                    for attribute, name in attributes.items()
+                },
+                "_names": attributes,
+                "refresh": _refreshSection,
+                "__repr__": _repr,
+            })
+
+    sections = attributeNames(block, "section")
+    block_class = type(
+        class_name,
+        (),
+        {
+            "__slots__": tuple(sections) + ("_block_key",),
+            "__annotations__": section_classes,
+            "_names": sections,
+            "_section_classes": section_classes,
+            "__init__": _initBlock,
+            "refresh": _refreshBlock,
+            "update": _updateBlock,
+            "__repr__": _repr,
+        })
+    _class_cache[schema] = block_class
+    return block_class
+
+
+def createAccessor(settings, block_key=None):
+    """
+    Creates an accessor object for a block and keeps it up to date with the settings.
+
+    The accessor is refreshed in place whenever the settings are loaded or saved, so references to it and to
+    its sections stay valid. Parameters added after the accessor was created are not picked up; create a new
+    accessor after changing the schema, and release the old one with releaseAccessor.
+
+    :param settings: The settings object, e.g. JsonSettings or SqliteSettings.
+    :type settings: JsonSettings
+    :param block_key: The key of the block, defaults to the block key of ``settings``.
+    :type block_key: str, optional
+    :return: The accessor object.
+    :rtype: object
+    :raises ValueError: If two section or parameter names map to the same attribute name.
+    """
+    if block_key is None:
+        block_key = settings.block_key
+    block = settings.data.get(block_key, {})
+    accessor = generateAccessorClass(block)(block, block_key)
+    settings.addCallback(accessor.update)
+    return accessor
+
+
+def releaseAccessor(settings, accessor):
+    """
+    Stops refreshing an accessor created with createAccessor.
+
+    :param settings: The settings object the accessor was created for.
+    :type settings: JsonSettings
+    :param accessor: The accessor object.
+    :type accessor: object
+    """
+    settings.removeCallback(accessor.update)
+
+
+def _initBlock(self, block, block_key=None):
+    self._block_key = block_key
+    for attribute in self._names:
+        setattr(self, attribute, self._section_classes[attribute]())
+    self.refresh(block)
+
+
+def _updateBlock(self, settings):
+    """
+    Refreshes the accessor from its block of a settings object. Used as settings callback.
+
+    :param settings: The settings object.
+    :type settings: JsonSettings
+    """
+    self.refresh(settings.data.get(self._block_key, {}))
+
+
+def _refreshBlock(self, block):
+    """
+    Updates the values of all sections from a settings block.
+
+    :param block: The settings block.
+    :type block: dict
+    """
+    for attribute, section in self._names.items():
+        getattr(self, attribute).refresh(block.get(section, {}))
+
+
+def _refreshSection(self, params_dict):
+    """
+    Updates the values of the section from its parameters.
+
+    :param params_dict: The parameters of the section.
+    :type params_dict: dict
+    """
+    for attribute, name in self._names.items():
+        setattr(self, attribute, resolveValue(params_dict.get(name, {})))
+
+
+def _repr(self):
+    values = ", ".join(f"{attribute}={getattr(self, attribute)!r}" for attribute in self._names)
+    return f"{type(self).__name__}({values})"
@@ -1,67 +1,404 @@
 __version__ = '0.4.1'
 
+import copy
+import gzip
 import json
+import os
+import time
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-class JsonSettings:
+# files modified more recently than this are always re-read, covering coarse file system timestamps
+RACY_SIGNATURE_SECONDS = 2
+
+# top level key of the schema version written by migrations.Migrator
+VERSION_KEY = '_schema_version'
+
+
+def openSettingsFile(filename, mode='r'):
     """
-    Class to handle the settings JSON file.
+    Open a settings file as a text stream, compressed according to its extension.
 
-    :param filename: The name of the JSON file.
+    Files ending with ``.gz`` are gzip compressed and files ending with ``.zst`` are zstd compressed (requires the
+    zstandard package). The data is decompressed or compressed while it is read or written.
+
+    :param filename: The name of the settings file.
     :type filename: str
-    :param block_key: The key for a specific block of settings, defaults to None.
-    :type block_key: str, optional
+    :param mode: 'r' for reading or 'w' for writing, defaults to 'r'.
+    :type mode: str, optional
+    :return: The opened text stream.
+    :rtype: io.TextIOBase
     """
-    def __init__(self, filename, block_key=None):
-        self.filename = filename
-        self.block_key = block_key
-        self.data = {}
-        self.block = {}
-        self.load()
+    if filename.endswith('.gz'):
+        return gzip.open(filename, mode + 't', encoding='utf-8')
+    if filename.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError(f"The zstandard package is required to open {filename}")
+        return zstandard.open(filename, mode + 't', encoding='utf-8')
+    return open(filename, mode)
 
-    def load(self, block_key=None):
+
+def dumpSettings(data, f, filename):
+    """
+    Write settings data to an opened settings file.
+
+    Compressed files are written without indentation, since they are not meant to be edited by hand.
+
+    :param data: The settings data.
+    :type data: dict
+    :param f: The opened settings file.
+    :type f: io.TextIOBase
+    :param filename: The name of the settings file.
+    :type filename: str
+    """
+    if filename.endswith(('.gz', '.zst')):
+        json.dump(data, f, separators=(',', ':'))
+    else:
+        json.dump(data, f, indent=4)
+
+
+def loadSettings(f):
+    """
+    Parse settings data from an opened settings file while reading it.
+
+    The top level object and the blocks are parsed member by member, and every section is decoded as soon as its
+    text has been read. Only the text of a single section is kept next to the parsed data, instead of the whole
+    (decompressed) text of the file.
+
+    :param f: The opened settings file.
+    :type f: io.TextIOBase
+    :return: The settings data.
+    :rtype: any
+    :raises json.JSONDecodeError: If the file is not valid JSON.
+    """
+    decoder = _StreamDecoder(f)
+    data = decoder.decode(depth=1)
+    if decoder.peek():
+        raise json.JSONDecodeError("Extra data", decoder.buffer, decoder.pos)
+    return data
+
+
+class _StreamDecoder:
+    """
+    Decodes a JSON document from a text stream, reading it in chunks.
+
+    Objects down to a given depth are parsed member by member, deeper values are decoded with
+    JSONDecoder.raw_decode once their text is complete.
+
+    :param f: The text stream.
+    :type f: io.TextIOBase
+    """
+    # characters read from the stream at a time
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read(self, size):
         """
-        Load the settings from the JSON file.
+        Append up to ``size`` characters of the stream to the buffer, dropping the parsed text.
 
-        :param block_key: The key for a specific block of settings, defaults to None.
-        :type block_key: str, optional
-        :return: The loaded settings data.
+        :param size: The number of characters to read.
+        :type size: int
+        :return: False if the stream is exhausted, True otherwise.
+        :rtype: bool
+        """
+        if self.eof:
+            return False
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and get the next character.
+
+        :return: The next character, or '' at the end of the stream.
+        :rtype: str
+        """
+        while True:
+            self.pos = json.decoder.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read(self.CHUNK_SIZE):
+                return ''
+
+    def expect(self, char):
+        """
+        Skip whitespace and the expected character.
+
+        :param char: The expected character.
+        :type char: str
+        :raises json.JSONDecodeError: If the next character is a different one.
+        """
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def decodeValue(self):
+        """
+        Decode the next value as a whole, reading more of the stream until its text is complete.
+
+        :return: The value.
+        :rtype: any
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # read as much again as is buffered, so long values are not decoded over and over
+                if not self.read(max(self.CHUNK_SIZE, len(self.buffer) - self.pos)):
+                    raise
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if end < len(self.buffer) or not self.read(self.CHUNK_SIZE):
+                self.pos = end
+                return value
+
+    def decodeObject(self, depth):
+        """
+        Parse the next object member by member.
+
+        :param depth: The number of nested object levels that are parsed member by member as well.
+        :type depth: int
+        :return: The object.
         :rtype: dict
         """
+        self.expect('{')
+        result = {}
+        if self.peek() == '}':
+            self.pos += 1
+            return result
+        while True:
+            if self.peek() != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", self.buffer, self.pos)
+            key = self.decodeValue()
+            self.expect(':')
+            result[key] = self.decode(depth - 1) if depth > 0 else self.decodeValue()
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return result
+            if char != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, self.pos - 1)
 
-        # TODO: allow a list to get a nested block
-        with open(self.filename, 'r') as f:
-            full_data = json.load(f)
+    def decode(self, depth=0):
+        """
+        Decode the next value, parsing objects member by member down to ``depth`` nested levels.
 
-        self.data = full_data
+        :param depth: The number of nested object levels that are parsed member by member.
+        :type depth: int, optional
+        :return: The value.
+        :rtype: any
+        """
+        if self.peek() == '{':
+            return self.decodeObject(depth)
+        return self.decodeValue()
 
-        if block_key is None:
-            block_key = self.block_key
 
-        if block_key is None:
-            return self.data
+def writeSettingsFile(filename, data):
+    """
+    Write settings data to a file atomically.
+
+    The data is written to a temporary file in the same directory, which then replaces the settings file, so
+    readers never see a partially written file.
+
+    :param filename: The name of the settings file.
+    :type filename: str
+    :param data: The settings data.
+    :type data: dict
+    """
+    # keep the extension, so the temporary file is compressed the same way
+    directory, basename = os.path.split(os.path.abspath(filename))
+    tmp_filename = os.path.join(directory, f'.tmp{os.getpid()}.{basename}')
+    try:
+        with openSettingsFile(tmp_filename, 'w') as f:
+            dumpSettings(data, f, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+    os.replace(tmp_filename, filename)
+
+
+class SettingsIndex:
+    """
+    Secondary indexes over the parameters of settings data, to find parameters by attribute without walking all
+    blocks and sections.
+
+    Parameters are identified by (block, section, name) tuples. The indexed attributes are "block", "section",
+    "type", "advanced", "auto" and "modified" (the value, or the auto flag, differs from the default).
+    """
+    ATTRIBUTES = ("block", "section", "type", "advanced", "auto", "modified")
+
+    def __init__(self):
+        self.index = {attribute: {} for attribute in self.ATTRIBUTES}
+        # indexed attribute values of each parameter, nested by block and section
+        self.entries = {}
+
+    @staticmethod
+    def attributes(block, section, info):
+        """
+        Get the indexed attributes of a parameter.
+
+        :param block: The block of the parameter.
+        :type block: str
+        :param section: The section of the parameter.
+        :type section: str
+        :param info: The parameter properties.
+        :type info: dict
+        :return: The value of each indexed attribute.
+        :rtype: tuple
+        """
+        if "auto" in info:
+            modified = "default" in info and info["auto"] != info["default"]
+        else:
+            modified = "default" in info and info.get("value") != info["default"]
+        return (block, section, info.get("type", "string"), bool(info.get("advanced", False)),
+                bool(info.get("auto", False)), modified)
+
+    def update(self, data, path=()):
+        """
+        Re-index the parameters at ``path`` of the settings data.
+
+        :param data: The full settings data.
+        :type data: dict
+        :param path: The key path of the changed block, section or parameter, defaults to () for all data.
+        :type path: tuple, optional
+        """
+        self.remove(path)
+
+        node = data
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                return
+            node = node[key]
+        if not isinstance(node, dict):
+            return
+
+        # wrap the subtree, so it can be walked like the full data
+        for key in reversed(path):
+            node = {key: node}
 
+        for block, block_data in node.items():
+            if not isinstance(block_data, dict):
+                continue
+            for section, params_dict in block_data.items():
+                if not isinstance(params_dict, dict):
+                    continue
+                for name, info in params_dict.items():
+                    if isinstance(info, dict):
+                        self.add((block, section, name), self.attributes(block, section, info))
+
+    def add(self, param, values):
+        """
+        Add a parameter to the indexes.
+
+        :param param: The (block, section, name) of the parameter.
+        :type param: tuple
+        :param values: The value of each indexed attribute.
+        :type values: tuple
+        """
+        block, section, name = param
+        self.entries.setdefault(block, {}).setdefault(section, {})[name] = values
+        for attribute, value in zip(self.ATTRIBUTES, values):
+            self.index[attribute].setdefault(value, set()).add(param)
+
+    def remove(self, path=()):
+        """
+        Remove all parameters at ``path`` from the indexes.
+
+        :param path: The key path of a block, section or parameter, defaults to () for all parameters.
+        :type path: tuple, optional
+        """
+        if not path:
+            self.index = {attribute: {} for attribute in self.ATTRIBUTES}
+            self.entries = {}
+            return
+
+        block_entries = self.entries.get(path[0])
+        if block_entries is None:
+            return
+        for section in [path[1]] if len(path) > 1 else list(block_entries):
+            params = block_entries.get(section, {})
+            for name in [path[2]] if len(path) > 2 else list(params):
+                values = params.pop(name, None)
+                if values is None:
+                    continue
+                for attribute, value in zip(self.ATTRIBUTES, values):
+                    self.index[attribute][value].discard((path[0], section, name))
+            if not params:
+                block_entries.pop(section, None)
+        if not block_entries:
+            del self.entries[path[0]]
+
+    def query(self, **criteria):
+        """
+        Find the parameters matching all criteria, e.g. ``query(block="block_key", advanced=True)``.
+
+        :param criteria: The required value of indexed attributes.
+        :type criteria: dict
+        :return: The (block, section, name) of the matching parameters.
+        :rtype: set of tuple
+        """
+        unknown = set(criteria) - set(self.ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Cannot query by {', '.join(sorted(unknown))}, indexed are {', '.join(self.ATTRIBUTES)}")
+        if not criteria:
+            return {param for values in self.index["block"].values() for param in values}
+        matches = sorted((self.index[attribute].get(value, set()) for attribute, value in criteria.items()), key=len)
+        return set(matches[0]).intersection(*matches[1:])
+
+
+class SettingsBase:
+    """
+    Common part of the settings classes: reading values of the current block, querying parameters and
+    callbacks on changes. Subclasses load the data and keep ``data``, ``block`` and ``index`` up to date.
+
+    :param block_key: The key for a specific block of settings, defaults to None.
+    :type block_key: str, optional
+    """
+    def __init__(self, block_key=None):
         self.block_key = block_key
+        self.data = {}
+        self.block = {}
+        self.callbacks = []
+        self.index = SettingsIndex()
 
-        if block_key not in full_data:
-            full_data[block_key] = {}
+    def addCallback(self, callback):
+        """
+        Register a function that is called with this object whenever the settings change on load or save.
 
-        block_data = full_data[block_key]
-        self.block = block_data
-        return block_data
+        :param callback: The function to be called.
+        :type callback: callable
+        """
+        self.callbacks.append(callback)
 
-    def save(self, block_key, new_data):
+    def removeCallback(self, callback):
         """
-        Save data to the JSON file.
+        Unregister a function added with addCallback.
 
-        :param block_key: The key for a specific block of settings.
-        :type block_key: str
-        :param new_data: The new data to be saved.
-        :type new_data: dict
+        :param callback: The function to be removed.
+        :type callback: callable
         """
-        self.data[block_key] = new_data
-        with open(self.filename, 'w') as f:
-            json.dump(self.data, f, indent=4)
+        self.callbacks.remove(callback)
+
+    def notifyCallbacks(self):
+        """ Calls all registered callbacks. """
+        for callback in list(self.callbacks):
+            callback(self)
 
     def get(self, key: list):
         """
@@ -98,3 +435,322 @@ class JsonSettings:
             if data is None:
                 return None
         return data.get("default", None)
+
+    def query(self, **criteria):
+        """
+        Find parameters by indexed attributes, e.g. ``query(block="block_key", modified=True)``.
+
+        See SettingsIndex for the indexed attributes.
+
+        :param criteria: The required value of indexed attributes.
+        :type criteria: dict
+        :return: The (block, section, name) of the matching parameters.
+        :rtype: set of tuple
+        """
+        return self.index.query(**criteria)
+
+
+class JsonSettings(SettingsBase):
+    """
+    Class to handle the settings JSON file.
+
+    Files ending with ``.json.gz`` or ``.json.zst`` are compressed transparently.
+
+    Settings can be stacked from several files. ``base_files`` are read first, lowest precedence first
+    (e.g. package defaults, then site overrides), and ``filename`` is the user layer on top of them. The
+    merged view is kept in ``data`` and only the parts of it touched by a changed layer are recomputed on
+    ``load``. The merged view shares unchanged parts with the parsed layers, so it must not be changed in place.
+    ``save`` writes only the user layer.
+
+    :param filename: The name of the JSON file.
+    :type filename: str
+    :param block_key: The key for a specific block of settings, defaults to None.
+    :type block_key: str, optional
+    :param base_files: JSON files layered below ``filename``, lowest precedence first, defaults to None.
+    :type base_files: list of str, optional
+    :param migrator: Migrates outdated files on load, defaults to None. Migrated user files are written back.
+    :type migrator: migrations.Migrator, optional
+    """
+    def __init__(self, filename, block_key=None, base_files=None, migrator=None):
+        super().__init__(block_key)
+        self.filename = filename
+        self.base_files = list(base_files or [])
+        self.migrator = migrator
+        # parsed content and file signature of each layer, lowest precedence first
+        self._layers = [{} for _ in self.layer_files]
+        self._signatures = [None for _ in self.layer_files]
+        self.load()
+
+    @property
+    def layer_files(self):
+        """
+        All layer files, lowest precedence first. The last one is the user layer.
+
+        :return: The layer file names.
+        :rtype: list of str
+        """
+        return self.base_files + [self.filename]
+
+    def load(self, block_key=None):
+        """
+        Load the settings from the JSON file.
+
+        :param block_key: The key for a specific block of settings, defaults to None.
+        :type block_key: str, optional
+        :return: The loaded settings data. It is the cached merged view, so do not change it in place; pass a changed
+            copy to save instead.
+        :rtype: dict
+        """
+
+        # TODO: allow a list to get a nested block
+        changed_paths = {}
+        for idx, layer_file in enumerate(self.layer_files):
+            signature = self._fileSignature(layer_file)
+            if signature is not None and signature == self._signatures[idx]:
+                continue
+            new_layer = self._readLayer(layer_file, is_user_layer=idx == len(self.base_files), is_lowest_layer=idx == 0)
+            changed_paths.update(dict.fromkeys(self._changedPaths(self._layers[idx], new_layer)))
+            self._layers[idx] = new_layer
+            self._signatures[idx] = self._fileSignature(layer_file)
+
+        copied = set()
+        for path in sorted(changed_paths, key=len):
+            self._remerge(path, copied)
+            self.index.update(self.data, path)
+        if changed_paths:
+            self.notifyCallbacks()
+
+        full_data = self.data
+
+        if block_key is None:
+            block_key = self.block_key
+
+        if block_key is None:
+            return self.data
+
+        self.block_key = block_key
+
+        if block_key not in full_data:
+            full_data[block_key] = {}
+
+        block_data = full_data[block_key]
+        self.block = block_data
+        return block_data
+
+    def save(self, block_key, new_data):
+        """
+        Save data to the JSON file.
+
+        Only the user layer is written. Entries equal to the value inherited from ``base_files`` are left out.
+
+        :param block_key: The key for a specific block of settings.
+        :type block_key: str
+        :param new_data: The new data to be saved. A copy of it is kept, so later changes to it are not saved.
+        :type new_data: dict
+        """
+        # the user layer and the merged view keep parts of the saved data
+        new_data = copy.deepcopy(new_data)
+        base_block = self._mergeLayers(self._layers[:-1], (block_key,))
+        user_layer = self._layers[-1]
+        if base_block is None:
+            user_layer[block_key] = new_data
+        else:
+            user_block = self._overrides(new_data, base_block)
+            if user_block is None:
+                user_layer.pop(block_key, None)
+            else:
+                user_layer[block_key] = user_block
+        if self.migrator is not None:
+            # a user layer written without the version would be migrated again on the next load
+            user_layer[VERSION_KEY] = self.migrator.version
+
+        writeSettingsFile(self.filename, user_layer)
+
+        self._signatures[-1] = self._fileSignature(self.filename)
+        old_data = {block_key: self.data[block_key]} if block_key in self.data else {}
+        self._remerge((block_key,))
+        self._remerge((VERSION_KEY,))
+        new_data = {block_key: self.data[block_key]} if block_key in self.data else {}
+        # re-index only the parameters that changed, not the whole block
+        for path in self._changedPaths(old_data, new_data):
+            self.index.update(self.data, path)
+        if block_key == self.block_key:
+            self.block = self.data[block_key]
+        self.notifyCallbacks()
+
+    @staticmethod
+    def _fileSignature(filename):
+        """
+        Get a cheap signature of a file to detect changes without reading it.
+
+        A file modified within the last RACY_SIGNATURE_SECONDS has no signature, since another write within the
+        same timestamp tick would not change it. Such files are read on every load until they are old enough.
+
+        :param filename: The name of the file.
+        :type filename: str
+        :return: The inode, modification time and size of the file, or None if it does not exist or was just
+            modified.
+        :rtype: tuple or None
+        """
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        if time.time_ns() - stat.st_mtime_ns < RACY_SIGNATURE_SECONDS * 1e9:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _readLayer(self, filename, is_user_layer=False, is_lowest_layer=True):
+        """
+        Read a single layer file.
+
+        A missing user layer is treated as empty when base files are present. Outdated layers are migrated, and
+        the migrated user layer is written back. Migration steps that change parameter definitions only apply to
+        the lowest layer, the higher layers only override some of its values.
+
+        :param filename: The name of the layer file.
+        :type filename: str
+        :param is_user_layer: Whether the file is the user layer.
+        :type is_user_layer: bool
+        :param is_lowest_layer: Whether the file is the lowest layer, which defines the parameters.
+        :type is_lowest_layer: bool
+        :return: The parsed layer.
+        :rtype: dict
+        """
+        if is_user_layer and self.base_files and not os.path.exists(filename):
+            return {}
+        with openSettingsFile(filename) as f:
+            layer = loadSettings(f)
+        if self.migrator is not None and self.migrator.migrate(layer, definitions=is_lowest_layer) and is_user_layer:
+            writeSettingsFile(filename, layer)
+        return layer
+
+    @classmethod
+    def _changedPaths(cls, old, new, prefix=(), depth=3):
+        """
+        Find the key paths that differ between two versions of a layer.
+
+        The search stops at parameter level (block, section, parameter).
+
+        :param old: The previous version of the layer.
+        :type old: dict
+        :param new: The new version of the layer.
+        :type new: dict
+        :return: The changed key paths, in the order of the keys.
+        :rtype: list of tuple
+        """
+        paths = []
+        for key in list(new) + [key for key in old if key not in new]:
+            old_value = old.get(key)
+            new_value = new.get(key)
+            if old_value == new_value and (key in old) == (key in new):
+                continue
+            path = prefix + (key,)
+            if depth > 1 and isinstance(old_value, dict) and isinstance(new_value, dict):
+                paths.extend(cls._changedPaths(old_value, new_value, path, depth - 1))
+            else:
+                paths.append(path)
+        return paths
+
+    @classmethod
+    def _mergeLayers(cls, layers, path):
+        """
+        Merge the subtree at ``path`` of several layers.
+
+        :param layers: The layers, lowest precedence first.
+        :type layers: list of dict
+        :param path: The key path of the subtree.
+        :type path: tuple
+        :return: The merged subtree, or None if no layer has it.
+        :rtype: any
+        """
+        merged = None
+        for layer in layers:
+            node = layer
+            for key in path:
+                if not isinstance(node, dict) or key not in node:
+                    break
+                node = node[key]
+            else:
+                if isinstance(merged, dict) and isinstance(node, dict):
+                    merged = cls._mergeDicts(merged, node)
+                else:
+                    # a subtree supplied by a single layer is used as parsed, without copying it
+                    merged = node
+        return merged
+
+    @classmethod
+    def _mergeDicts(cls, base, override):
+        """
+        Recursively merge ``override`` into a copy of ``base``.
+
+        Only the dicts present in both are copied, all other values are shared with ``base`` and ``override``.
+
+        :param base: The lower precedence data.
+        :type base: dict
+        :param override: The higher precedence data.
+        :type override: dict
+        :return: The merged data.
+        :rtype: dict
+        """
+        merged = dict(base)
+        for key, value in override.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = cls._mergeDicts(merged[key], value)
+            else:
+                merged[key] = value
+        return merged
+
+    @classmethod
+    def _overrides(cls, data, base):
+        """
+        Get the part of ``data`` that differs from ``base``.
+
+        :param data: The full data.
+        :type data: dict
+        :param base: The inherited data.
+        :type base: dict
+        :return: The entries of ``data`` not equal to ``base``, or None if there are none.
+        :rtype: dict or None
+        """
+        overrides = {}
+        for key, value in data.items():
+            if key not in base:
+                overrides[key] = value
+            elif isinstance(value, dict) and isinstance(base[key], dict):
+                sub_overrides = cls._overrides(value, base[key])
+                if sub_overrides is not None:
+                    overrides[key] = sub_overrides
+            elif value != base[key]:
+                overrides[key] = value
+        return overrides or None
+
+    def _remerge(self, path, copied=None):
+        """
+        Recompute the merged view at ``path`` from all layers.
+
+        The dicts above ``path`` may be shared with a layer, so they are copied before they are changed.
+
+        :param path: The key path to recompute.
+        :type path: tuple
+        :param copied: The ids of the dicts of the merged view already copied while recomputing several paths,
+            defaults to None.
+        :type copied: set, optional
+        """
+        if copied is None:
+            copied = set()
+        merged = self._mergeLayers(self._layers, path)
+        node = self.data
+        for key in path[:-1]:
+            if not isinstance(node.get(key), dict):
+                if merged is None:
+                    return
+                node[key] = {}
+            elif id(node[key]) not in copied:
+                node[key] = dict(node[key])
+            copied.add(id(node[key]))
+            node = node[key]
+        if merged is None:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = merged
@@ -0,0 +1,384 @@
+__version__ = '0.4.1'
+
+import difflib
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .json_settings import VERSION_KEY, loadSettings, openSettingsFile, writeSettingsFile
+
+# file name patterns of the settings files migrated by Migrator.migrateDirectory by default
+SETTINGS_PATTERNS = ("*.json", "*.json.gz", "*.json.zst")
+
+
+class MigrationStep:
+    """
+    A single change of the settings schema. Subclasses override apply.
+
+    Steps that change parameter definitions (``definition = True``) are only applied to complete settings, not to
+    sparse layers that override single values, where an added definition would hide the one of the lower layers.
+    """
+    definition = False
+
+    def apply(self, data):
+        """
+        Applies the change to the settings data in place. This method should be overridden by subclasses.
+
+        :param data: The full settings data.
+        :type data: dict
+        """
+        pass
+
+    @staticmethod
+    def getSection(data, block, section, create=False):
+        """
+        Gets a section of the settings data.
+
+        :param data: The full settings data.
+        :type data: dict
+        :param block: The block of the section.
+        :type block: str
+        :param section: The name of the section.
+        :type section: str
+        :param create: Whether to create the block and section if they do not exist.
+        :type create: bool, optional
+        :return: The parameters of the section, or None if it does not exist.
+        :rtype: dict or None
+        """
+        if create:
+            return data.setdefault(block, {}).setdefault(section, {})
+        return data.get(block, {}).get(section)
+
+
+class RenameParameter(MigrationStep):
+    """
+    Renames a parameter, keeping its position in the section.
+
+    :param block: The block of the parameter.
+    :type block: str
+    :param section: The section of the parameter.
+    :type section: str
+    :param name: The current name of the parameter.
+    :type name: str
+    :param new_name: The new name of the parameter.
+    :type new_name: str
+    """
+    def __init__(self, block, section, name, new_name):
+        self.block = block
+        self.section = section
+        self.name = name
+        self.new_name = new_name
+
+    def apply(self, data):
+        params_dict = self.getSection(data, self.block, self.section)
+        if params_dict is None or self.name not in params_dict:
+            return
+        renamed = {(self.new_name if name == self.name else name): info for name, info in params_dict.items()}
+        params_dict.clear()
+        params_dict.update(renamed)
+
+
+class MoveParameter(MigrationStep):
+    """
+    Moves a parameter to another section, possibly of another block.
+
+    A ValueError is raised if the other section already has a parameter of that name.
+
+    :param block: The block of the parameter.
+    :type block: str
+    :param section: The section of the parameter.
+    :type section: str
+    :param name: The name of the parameter.
+    :type name: str
+    :param new_block: The block to move the parameter to.
+    :type new_block: str
+    :param new_section: The section to move the parameter to.
+    :type new_section: str
+    """
+    def __init__(self, block, section, name, new_block, new_section):
+        self.block = block
+        self.section = section
+        self.name = name
+        self.new_block = new_block
+        self.new_section = new_section
+
+    def apply(self, data):
+        params_dict = self.getSection(data, self.block, self.section)
+        if params_dict is None or self.name not in params_dict:
+            return
+        new_params_dict = self.getSection(data, self.new_block, self.new_section)
+        if new_params_dict is not None and new_params_dict is not params_dict and self.name in new_params_dict:
+            raise ValueError(f"Cannot move parameter {self.name!r} to section {self.new_section!r} of block "
+                             f"{self.new_block!r}, it already exists there")
+        info = params_dict.pop(self.name)
+        self.getSection(data, self.new_block, self.new_section, create=True)[self.name] = info
+
+
+class MoveSection(MigrationStep):
+    """
+    Moves a section to another block, optionally renaming it.
+
+    If the new section already exists, the parameters are appended to it. A ValueError is raised if both sections
+    have a parameter of the same name.
+
+    :param block: The block of the section.
+    :type block: str
+    :param section: The name of the section.
+    :type section: str
+    :param new_block: The block to move the section to.
+    :type new_block: str
+    :param new_section: The new name of the section, defaults to None to keep the name.
+    :type new_section: str, optional
+    """
+    def __init__(self, block, section, new_block, new_section=None):
+        self.block = block
+        self.section = section
+        self.new_block = new_block
+        self.new_section = new_section or section
+
+    def apply(self, data):
+        params_dict = self.getSection(data, self.block, self.section)
+        if params_dict is None:
+            return
+        new_params_dict = self.getSection(data, self.new_block, self.new_section)
+        if new_params_dict is None or new_params_dict is params_dict:
+            data[self.block].pop(self.section)
+            data.setdefault(self.new_block, {})[self.new_section] = params_dict
+            return
+        conflicts = [name for name in params_dict if name in new_params_dict]
+        if conflicts:
+            raise ValueError(f"Cannot move section {self.section!r} to {self.new_section!r} of block "
+                             f"{self.new_block!r}, both have the parameters {', '.join(map(repr, conflicts))}")
+        data[self.block].pop(self.section)
+        new_params_dict.update(params_dict)
+
+
+class AddParameter(MigrationStep):
+    """
+    Adds a parameter if it does not exist yet.
+
+    :param block: The block of the parameter.
+    :type block: str
+    :param section: The section of the parameter.
+    :type section: str
+    :param name: The name of the parameter.
+    :type name: str
+    :param info: The properties of the parameter.
+    :type info: dict
+    """
+    definition = True
+
+    def __init__(self, block, section, name, info):
+        self.block = block
+        self.section = section
+        self.name = name
+        self.info = info
+
+    def apply(self, data):
+        params_dict = self.getSection(data, self.block, self.section, create=True)
+        if self.name not in params_dict:
+            params_dict[self.name] = json.loads(json.dumps(self.info))
+
+
+class RemoveParameter(MigrationStep):
+    """
+    Removes a parameter.
+
+    :param block: The block of the parameter.
+    :type block: str
+    :param section: The section of the parameter.
+    :type section: str
+    :param name: The name of the parameter.
+    :type name: str
+    """
+    def __init__(self, block, section, name):
+        self.block = block
+        self.section = section
+        self.name = name
+
+    def apply(self, data):
+        params_dict = self.getSection(data, self.block, self.section)
+        if params_dict is not None:
+            params_dict.pop(self.name, None)
+
+
+class SetAttributes(MigrationStep):
+    """
+    Sets properties of an existing parameter, e.g. a new "type", "range" or "options".
+
+    A value of None removes the property.
+
+    :param block: The block of the parameter.
+    :type block: str
+    :param section: The section of the parameter.
+    :type section: str
+    :param name: The name of the parameter.
+    :type name: str
+    :param attributes: The properties to be set.
+    :type attributes: dict
+    """
+    definition = True
+
+    def __init__(self, block, section, name, **attributes):
+        self.block = block
+        self.section = section
+        self.name = name
+        self.attributes = attributes
+
+    def apply(self, data):
+        params_dict = self.getSection(data, self.block, self.section)
+        if params_dict is None or self.name not in params_dict:
+            return
+        info = params_dict[self.name]
+        for key, value in self.attributes.items():
+            if value is None:
+                info.pop(key, None)
+            else:
+                info[key] = json.loads(json.dumps(value))
+
+
+class Migration:
+    """
+    The steps to migrate settings from the previous schema version to ``version``.
+
+    :param version: The schema version after the migration.
+    :type version: int
+    :param steps: The steps of the migration, applied in order.
+    :type steps: list of MigrationStep
+    :param description: A short description of the migration, defaults to "".
+    :type description: str, optional
+    """
+    def __init__(self, version, steps, description=""):
+        self.version = version
+        self.steps = steps
+        self.description = description
+
+    def apply(self, data, definitions=True):
+        """
+        Applies all steps to the settings data in place.
+
+        :param data: The full settings data.
+        :type data: dict
+        :param definitions: Whether to apply the steps that change parameter definitions, defaults to True.
+        :type definitions: bool, optional
+        """
+        for step in self.steps:
+            if definitions or not step.definition:
+                step.apply(data)
+
+
+class Migrator:
+    """
+    Migrates settings files to the latest schema version.
+
+    The schema version of a file is stored under VERSION_KEY; files without it have version 0. Pass a Migrator to
+    JsonSettings to migrate files on load.
+
+    :param migrations: The migrations, in any order.
+    :type migrations: list of Migration
+    """
+    def __init__(self, migrations):
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+
+    @property
+    def version(self):
+        """
+        The latest schema version.
+
+        :return: The version of the last migration, or 0 if there are none.
+        :rtype: int
+        """
+        return self.migrations[-1].version if self.migrations else 0
+
+    def migrate(self, data, definitions=True):
+        """
+        Migrates settings data in place.
+
+        :param data: The full settings data.
+        :type data: dict
+        :param definitions: Whether to apply the steps that change parameter definitions, defaults to True. Pass
+            False for sparse layers that only override some values of lower layers.
+        :type definitions: bool, optional
+        :return: Whether the data was changed.
+        :rtype: bool
+        """
+        version = data.get(VERSION_KEY, 0)
+        if version > self.version:
+            raise ValueError(f"Settings schema version {version} is newer than the supported version {self.version}")
+        if version == self.version:
+            return False
+        for migration in self.migrations:
+            if migration.version > version:
+                migration.apply(data, definitions)
+        data[VERSION_KEY] = self.version
+        return True
+
+    def migrateFile(self, filename, dry_run=False):
+        """
+        Migrates a settings file. The file is replaced atomically.
+
+        :param filename: The name of the settings file.
+        :type filename: str
+        :param dry_run: Whether to only compute the changes without writing the file, defaults to False.
+        :type dry_run: bool, optional
+        :return: A unified diff of the changes, empty if the file is up to date.
+        :rtype: str
+        """
+        with openSettingsFile(filename) as f:
+            data = loadSettings(f)
+        before = json.dumps(data, indent=4).splitlines(keepends=True)
+        if not self.migrate(data):
+            return ""
+        after = json.dumps(data, indent=4).splitlines(keepends=True)
+        if not dry_run:
+            writeSettingsFile(filename, data)
+        return "".join(difflib.unified_diff(before, after, filename, filename))
+
+    def migrateDirectory(self, directory, pattern=None, dry_run=False, max_workers=None):
+        """
+        Migrates all matching settings files of a directory in parallel.
+
+        A file that cannot be migrated does not stop the others, its error is returned instead.
+
+        :param directory: The directory containing the settings files.
+        :type directory: str
+        :param pattern: The glob pattern of the settings files, defaults to None for SETTINGS_PATTERNS.
+        :type pattern: str, optional
+        :param dry_run: Whether to only compute the changes without writing the files, defaults to False.
+        :type dry_run: bool, optional
+        :param max_workers: The number of worker processes, defaults to None for the number of CPUs.
+        :type max_workers: int, optional
+        :return: The unified diff of each changed file and the error of each failed file, keyed by file name.
+        :rtype: tuple of dict
+        """
+        patterns = SETTINGS_PATTERNS if pattern is None else (pattern,)
+        filenames = sorted({filename for name_pattern in patterns
+                            for filename in glob.glob(os.path.join(directory, name_pattern))})
+        diffs = {}
+        errors = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self._tryMigrateFile, filenames, repeat(dry_run), chunksize=16)
+            for filename, (diff, error) in zip(filenames, results):
+                if error is not None:
+                    errors[filename] = error
+                elif diff:
+                    diffs[filename] = diff
+        return diffs, errors
+
+    def _tryMigrateFile(self, filename, dry_run=False):
+        """
+        Migrates a settings file like migrateFile, but returns the error instead of raising it.
+
+        :param filename: The name of the settings file.
+        :type filename: str
+        :param dry_run: Whether to only compute the changes without writing the file, defaults to False.
+        :type dry_run: bool, optional
+        :return: The diff and None, or None and the error.
+        :rtype: tuple
+        """
+        try:
+            return self.migrateFile(filename, dry_run), None
+        except Exception as error:
+            return None, error
@@ -1,5 +1,6 @@
 __version__ = '0.4.1'
 
+import copy
 import sys
 
 try:
@@ -55,12 +56,19 @@ class SettingsTabWidget(QTableWidget):
     :type params_dict: dict
     :param parent: The parent widget.
     :type parent: QWidget, optional
+    :param visible_params: The names of the parameters to show, defaults to None to show all.
+    :type visible_params: set of str, optional
     """
 
-    def __init__(self, section_name, params_dict, hide_advanced=False, parent=None):
+    # backgrounds shared by all rows
+    NAME_BRUSH = QBrush(QColor(240, 240, 240))  # Light gray background
+    DEFAULT_BRUSH = QBrush(QColor(250, 255, 250))
+
+    def __init__(self, section_name, params_dict, hide_advanced=False, parent=None, visible_params=None):
         super().__init__(parent)
         self.section_name = section_name
         self.params_dict = params_dict
+        self.visible_params = visible_params
 
         self.param_types = {}
         self.param_types_defaults = {}
@@ -76,8 +84,12 @@ class SettingsTabWidget(QTableWidget):
     def loadData(self):
         """ Loads the parameters into the table widget. """
 
-        # TODO: implement a way to hide/show certain parameters
-        param_dict_visible = self.params_dict
+        if self.visible_params is None:
+            param_dict_visible = self.params_dict
+        else:
+            param_dict_visible = {
+                param_name: info for param_name, info in self.params_dict.items() if param_name in self.visible_params
+            }
 
         self.setRowCount(len(param_dict_visible))
 
@@ -101,7 +113,7 @@ class SettingsTabWidget(QTableWidget):
             param_item = QTableWidgetItem(param_name)
             param_item.setFlags(param_item.flags() & ~Qt.ItemIsEditable)
             self.setItem(row_idx, 0, param_item)
-            param_item.setBackground(QBrush(QColor(240, 240, 240)))  # Light gray background
+            param_item.setBackground(self.NAME_BRUSH)
 
             # Column 1: Value (editable)
             if param_type == "color":
@@ -140,7 +152,7 @@ class SettingsTabWidget(QTableWidget):
             default_item = QTableWidgetItem(str(param_default_to_show))
             default_item.setFlags(default_item.flags() & ~Qt.ItemIsEditable)
             self.setItem(row_idx, 2, default_item)
-            default_item.setBackground(QBrush(QColor(250, 255, 250)))
+            default_item.setBackground(self.DEFAULT_BRUSH)
 
             if self.hide_advanced and advanced:
                 self.hideRow(row_idx)
@@ -150,24 +162,31 @@ class SettingsTableDialog(QDialog):
     """
     A dialog for displaying and editing settings in a tabbed interface.
 
-    :param json_file: The path to the JSON file containing the settings.
-    :type json_file: str
+    :param json_file: The path to the JSON file containing the settings, or a settings object such as
+        JsonSettings or SqliteSettings.
+    :type json_file: str or JsonSettings or SqliteSettings
     :param block_key: The key for a specific block of settings, defaults to None.
     :type block_key: str, optional
     :param parent: The parent widget.
     :type parent: QWidget, optional
+    :param base_files: JSON files layered below ``json_file``, lowest precedence first, defaults to None.
+        Ignored if ``json_file`` is a settings object.
+    :type base_files: list of str, optional
     """
 
     # signal emitted when the apply button is clicked
     applyClicked = Signal()
 
-    def __init__(self, json_file, block_key=None, parent=None):
+    def __init__(self, json_file, block_key=None, parent=None, base_files=None):
         super().__init__(parent)
         self.json_file = json_file
         self.block_key = block_key
         self.settings_dict = {}
 
-        self.settings = JsonSettings(self.json_file)
+        if isinstance(json_file, str):
+            self.settings = JsonSettings(self.json_file, base_files=base_files)
+        else:
+            self.settings = json_file
         self.setWindowTitle("Settings")
 
         main_layout = QVBoxLayout(self)
@@ -184,6 +203,12 @@ class SettingsTableDialog(QDialog):
         self.advanced_checkbox.clicked.connect(self.onAdvancedCheckboxToggled)
         advanced_layout.addWidget(self.advanced_checkbox)
 
+        # Modified checkbox
+        self.modified_checkbox = QCheckBox("Show only modified parameters")
+        self.modified_checkbox.setChecked(False)
+        self.modified_checkbox.clicked.connect(self.onModifiedCheckboxToggled)
+        advanced_layout.addWidget(self.modified_checkbox)
+
         # OK button
         self.save_button = QPushButton("Ok")
         self.save_button.clicked.connect(self.onOkClicked)
@@ -209,17 +234,31 @@ class SettingsTableDialog(QDialog):
         self.close_button.clicked.connect(self.reject)
         button_layout.addWidget(self.close_button)
 
-        self.loadData(self.advanced_checkbox.isChecked())
+        self.loadData(self.advanced_checkbox.isChecked(), self.modified_checkbox.isChecked())
+
+    def loadData(self, hide_advanced=False, only_modified=False):
+        """
+        Reads the entire JSON file and extracts only the block we care about.
 
-    def loadData(self, hide_advanced=False):
-        """ Reads the entire JSON file and extracts only the block we care about. """
+        :param hide_advanced: Whether to hide advanced parameters.
+        :type hide_advanced: bool, optional
+        :param only_modified: Whether to show only parameters that differ from their default.
+        :type only_modified: bool, optional
+        """
         settings_block = self.settings.load(self.block_key)
 
+        modified_params = {}
+        if only_modified:
+            for _, section_name, param_name in self.settings.query(block=self.block_key, modified=True):
+                modified_params.setdefault(section_name, set()).add(param_name)
+
         current_tab_index = self.tab_widget.currentIndex()
 
         self.tab_widget.clear()
         for section_name, params_dict in settings_block.items():
-            table = SettingsTabWidget(section_name, params_dict, parent=self.tab_widget, hide_advanced=hide_advanced)
+            visible_params = modified_params.get(section_name, set()) if only_modified else None
+            table = SettingsTabWidget(section_name, params_dict, parent=self.tab_widget, hide_advanced=hide_advanced,
+                                      visible_params=visible_params)
             self.tab_widget.addTab(table, section_name)
 
         if current_tab_index != -1 and current_tab_index < self.tab_widget.count():
@@ -227,7 +266,11 @@ class SettingsTableDialog(QDialog):
 
     def onAdvancedCheckboxToggled(self):
         """ Handles the advanced checkbox toggled event. """
-        self.loadData(hide_advanced=self.advanced_checkbox.isChecked())
+        self.loadData(self.advanced_checkbox.isChecked(), self.modified_checkbox.isChecked())
+
+    def onModifiedCheckboxToggled(self):
+        """ Handles the modified checkbox toggled event. """
+        self.loadData(self.advanced_checkbox.isChecked(), self.modified_checkbox.isChecked())
 
     def collectData(self):
         """
@@ -236,8 +279,8 @@ class SettingsTableDialog(QDialog):
         :return: The updated settings block.
         :rtype: dict
         """
-        # read JSON
-        settings_block = self.settings.load(self.block_key)
+        # read JSON, the loaded block is shared with the settings object
+        settings_block = copy.deepcopy(self.settings.load(self.block_key))
 
         # collect data from each tab
         try:
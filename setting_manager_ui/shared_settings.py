@@ -0,0 +1,250 @@
+__version__ = '0.4.1'
+
+import json
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+from .json_settings import SettingsBase
+
+# version counter, payload length and generation at the start of a shared memory block. The generation is only
+# used in the first block, it tells subscribers which block currently holds the snapshot.
+HEADER = struct.Struct("<QQQ")
+GENERATION = struct.Struct("<Q")
+GENERATION_OFFSET = 16
+
+# seconds to wait between attempts to read a snapshot that is being written
+RETRY_INTERVAL = 0.001
+
+
+def segmentName(name, generation):
+    """
+    Gets the name of the shared memory block of a generation.
+
+    :param name: The name of the first shared memory block.
+    :type name: str
+    :param generation: The generation.
+    :type generation: int
+    :return: The name of the shared memory block.
+    :rtype: str
+    """
+    return name if generation == 0 else f"{name}_{generation}"
+
+
+class SettingsPublisher:
+    """
+    Publishes the settings of a settings object to a shared memory block.
+
+    A compact JSON snapshot is written whenever the settings are loaded with changes or saved, together with a
+    version counter. The counter is odd while a snapshot is being written, so readers can detect torn reads.
+    When a snapshot outgrows the block, it is moved to a larger block of the next generation, named
+    ``<name>_<generation>``, and the first block tells subscribers about the move.
+
+    :param settings: The settings object, e.g. JsonSettings or SqliteSettings.
+    :type settings: JsonSettings
+    :param name: The name of the shared memory block, defaults to None for a generated name.
+    :type name: str, optional
+    :param size: The size of the shared memory block in bytes, defaults to None for four times the first snapshot.
+    :type size: int, optional
+    """
+    def __init__(self, settings, name=None, size=None):
+        self.settings = settings
+        self.version = 0
+        self.generation = 0
+        payload = self.serialize()
+        if size is None:
+            size = max(4 * len(payload), 65536)
+        self.base = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + size)
+        self.shm = self.base
+        self.name = self.base.name
+        try:
+            self.writePayload(payload)
+        except BaseException:
+            self.base.close()
+            self.base.unlink()
+            raise
+        settings.addCallback(self.publish)
+
+    def serialize(self):
+        """
+        Serializes the settings to a compact snapshot.
+
+        :return: The snapshot.
+        :rtype: bytes
+        """
+        return json.dumps(self.settings.data, separators=(",", ":")).encode("utf-8")
+
+    def publish(self, settings=None):
+        """
+        Publishes the current settings as a new version.
+
+        :param settings: The settings object that changed, passed by the settings callbacks.
+        :type settings: JsonSettings, optional
+        """
+        self.writePayload(self.serialize())
+
+    def writePayload(self, payload):
+        """
+        Writes a snapshot to the shared memory block and increments the version.
+
+        :param payload: The snapshot.
+        :type payload: bytes
+        """
+        if HEADER.size + len(payload) > self.shm.size:
+            self.grow(len(payload))
+        buf = self.shm.buf
+        HEADER.pack_into(buf, 0, self.version + 1, 0, self.generation)
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        self.version += 2
+        HEADER.pack_into(buf, 0, self.version, len(payload), self.generation)
+
+    def grow(self, size):
+        """
+        Moves the snapshots to a new, larger shared memory block of the next generation.
+
+        The previous block is removed, unless it is the first one, which keeps pointing to the current generation.
+        Subscribers that still map the previous block switch on their next poll.
+
+        :param size: The minimal size of the snapshot in bytes.
+        :type size: int
+        """
+        size = max(4 * size, 2 * (self.shm.size - HEADER.size))
+        generation = self.generation + 1
+        shm = shared_memory.SharedMemory(name=segmentName(self.name, generation), create=True,
+                                         size=HEADER.size + size)
+        # the new block starts with the current snapshot, so subscribers never see an empty block
+        length = HEADER.unpack_from(self.shm.buf, 0)[1]
+        shm.buf[HEADER.size:HEADER.size + length] = self.shm.buf[HEADER.size:HEADER.size + length]
+        HEADER.pack_into(shm.buf, 0, self.version, length, generation)
+
+        previous = self.shm
+        self.shm = shm
+        self.generation = generation
+        GENERATION.pack_into(self.base.buf, GENERATION_OFFSET, generation)
+        if previous is not self.base:
+            previous.close()
+            previous.unlink()
+
+    def close(self):
+        """ Stops publishing and removes the shared memory blocks. """
+        if self.publish in self.settings.callbacks:
+            self.settings.removeCallback(self.publish)
+        if self.shm is not self.base:
+            self.shm.close()
+            self.shm.unlink()
+        self.base.close()
+        self.base.unlink()
+
+
+class SettingsSubscriber(SettingsBase):
+    """
+    Reads the settings published by a SettingsPublisher, e.g. in a worker process.
+
+    The snapshot is read straight from the shared memory block and only when its version has changed, so
+    workers pick up new settings without reading the settings file. The interface for reading settings is the
+    same as JsonSettings.
+
+    :param name: The name of the shared memory block.
+    :type name: str
+    :param block_key: The key for a specific block of settings, defaults to None.
+    :type block_key: str, optional
+    :param timeout: Seconds to wait for a snapshot that is being written, defaults to 1.0.
+    :type timeout: float, optional
+    """
+    def __init__(self, name, block_key=None, timeout=1.0):
+        super().__init__(block_key)
+        self.base = self.openSegment(name)
+        self.shm = self.base
+        self.name = name
+        self.generation = 0
+        self.version = 0
+        self.timeout = timeout
+        self.load()
+
+    @staticmethod
+    def openSegment(name):
+        """
+        Attaches to a shared memory block of the publisher.
+
+        :param name: The name of the shared memory block.
+        :type name: str
+        :return: The shared memory block.
+        :rtype: SharedMemory
+        """
+        if sys.version_info >= (3, 13):
+            # the publisher owns the block, it must not be removed when a worker exits
+            return shared_memory.SharedMemory(name=name, track=False)
+        # multiprocessing workers share the resource tracker of the publisher process
+        return shared_memory.SharedMemory(name=name)
+
+    def followGeneration(self):
+        """ Switches to the shared memory block of the current generation if the publisher moved the snapshots. """
+        generation = GENERATION.unpack_from(self.base.buf, GENERATION_OFFSET)[0]
+        if generation == self.generation:
+            return
+        shm = self.openSegment(segmentName(self.name, generation))
+        if self.shm is not self.base:
+            self.shm.close()
+        self.shm = shm
+        self.generation = generation
+
+    def poll(self):
+        """
+        Reads the published settings if a new version is available.
+
+        :return: True if new settings were read, False otherwise.
+        :rtype: bool
+        :raises TimeoutError: If no complete snapshot could be read within ``timeout`` seconds, e.g. because the
+            publisher stopped while writing.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self.followGeneration()
+            except FileNotFoundError:
+                # the block was replaced again before we attached to it
+                pass
+            else:
+                buf = self.shm.buf
+                version, length, _ = HEADER.unpack_from(buf, 0)
+                if version == self.version:
+                    return False
+                if not version % 2:
+                    payload = bytes(buf[HEADER.size:HEADER.size + length])
+                    if HEADER.unpack_from(buf, 0)[0] == version:
+                        break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"No complete settings snapshot in shared memory {self.name!r} "
+                                   f"within {self.timeout} seconds")
+            time.sleep(RETRY_INTERVAL)
+
+        self.data = json.loads(payload.decode("utf-8"))
+        self.version = version
+        self.block = self.data.setdefault(self.block_key, {}) if self.block_key is not None else {}
+        self.index.update(self.data)
+        self.notifyCallbacks()
+        return True
+
+    def load(self, block_key=None):
+        """
+        Load the latest published settings.
+
+        :param block_key: The key for a specific block of settings, defaults to None.
+        :type block_key: str, optional
+        :return: The loaded settings data. It is the cached data, so do not change it in place.
+        :rtype: dict
+        """
+        if block_key is not None:
+            self.block_key = block_key
+            self.block = self.data.setdefault(block_key, {})
+        self.poll()
+        if self.block_key is None:
+            return self.data
+        return self.block
+
+    def close(self):
+        """ Detaches from the shared memory blocks. """
+        if self.shm is not self.base:
+            self.shm.close()
+        self.base.close()
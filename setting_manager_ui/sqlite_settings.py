@@ -0,0 +1,288 @@
+__version__ = '0.4.1'
+
+import copy
+import json
+import sqlite3
+
+from .json_settings import VERSION_KEY, SettingsBase, dumpSettings, loadSettings, openSettingsFile
+
+
+class SqliteSettings(SettingsBase):
+    """
+    Class to handle settings stored in a local SQLite database.
+
+    It offers the same interface as JsonSettings, but every parameter is stored in its own row, so single
+    parameters can be read and written without rewriting the whole document. The database is opened in WAL
+    mode, which lets other processes read while the settings are written. When only a block is loaded, all
+    blocks are still indexed once, so query finds the parameters of every block.
+
+    :param filename: The name of the SQLite database file.
+    :type filename: str
+    :param block_key: The key for a specific block of settings, defaults to None.
+    :type block_key: str, optional
+    """
+    def __init__(self, filename, block_key=None):
+        super().__init__(block_key)
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # whether the index covers all blocks, not just the loaded one
+        self._indexed_all = False
+        self.createTables()
+        self.load()
+
+    def createTables(self):
+        """ Creates the tables if they do not exist yet. """
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS blocks ("
+                "block TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS sections ("
+                "block TEXT NOT NULL, section TEXT NOT NULL, position INTEGER NOT NULL, "
+                "PRIMARY KEY (block, section))")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS parameters ("
+                "block TEXT NOT NULL, section TEXT NOT NULL, name TEXT NOT NULL, position INTEGER NOT NULL, "
+                "info TEXT NOT NULL, PRIMARY KEY (block, section, name))")
+            # top level entries of the JSON format that are not blocks, e.g. the schema version
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def close(self):
+        """ Closes the database connection. """
+        self.connection.close()
+
+    def load(self, block_key=None):
+        """
+        Load the settings from the database.
+
+        :param block_key: The key for a specific block of settings, defaults to None.
+        :type block_key: str, optional
+        :return: The loaded settings data. It is the cached data, so do not change it in place; pass a changed copy
+            to save instead.
+        :rtype: dict
+        """
+        if block_key is None:
+            block_key = self.block_key
+
+        if block_key is None:
+            self.data = self.readBlocks()
+            self.index.update(self.data)
+            self._indexed_all = True
+            self.notifyCallbacks()
+            return self.data
+
+        self.block_key = block_key
+        if self._indexed_all:
+            self.data.update(self.readBlocks(block_key))
+            self.index.update(self.data, (block_key,))
+        else:
+            all_blocks = self.readBlocks()
+            self.index.update(all_blocks)
+            self._indexed_all = True
+            if block_key in all_blocks:
+                self.data[block_key] = all_blocks[block_key]
+        self.notifyCallbacks()
+
+        if block_key not in self.data:
+            self.data[block_key] = {}
+
+        self.block = self.data[block_key]
+        return self.block
+
+    def readBlocks(self, block_key=None):
+        """
+        Read blocks from the database.
+
+        :param block_key: The block to read, defaults to None to read all blocks.
+        :type block_key: str, optional
+        :return: The blocks, keyed by block name.
+        :rtype: dict
+        """
+        where = "" if block_key is None else " WHERE block = ?"
+        args = () if block_key is None else (block_key,)
+        data = {}
+        for (block,) in self.connection.execute(f"SELECT block FROM blocks{where} ORDER BY position", args):
+            data[block] = {}
+        for block, section in self.connection.execute(
+                f"SELECT block, section FROM sections{where} ORDER BY block, position", args):
+            data.setdefault(block, {})[section] = {}
+        for block, section, name, info in self.connection.execute(
+                f"SELECT block, section, name, info FROM parameters{where} ORDER BY block, section, position", args):
+            data.setdefault(block, {}).setdefault(section, {})[name] = json.loads(info)
+        return data
+
+    def save(self, block_key, new_data):
+        """
+        Save a block to the database.
+
+        Only the parameters that differ from the stored ones are written.
+
+        :param block_key: The key for a specific block of settings.
+        :type block_key: str
+        :param new_data: The new data to be saved.
+        :type new_data: dict
+        """
+        stored = {
+            (section, name): (position, info)
+            for section, name, position, info in self.connection.execute(
+                "SELECT section, name, position, info FROM parameters WHERE block = ?", (block_key,))
+        }
+        rows = []
+        for section, params_dict in new_data.items():
+            for position, (name, info) in enumerate(params_dict.items()):
+                row = (position, json.dumps(info))
+                if stored.pop((section, name), None) != row:
+                    rows.append((block_key, section, name) + row)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO blocks (block, position) "
+                "VALUES (?, (SELECT COUNT(*) FROM blocks))", (block_key,))
+            self.connection.execute("DELETE FROM sections WHERE block = ?", (block_key,))
+            self.connection.executemany(
+                "INSERT INTO sections (block, section, position) VALUES (?, ?, ?)",
+                [(block_key, section, position) for position, section in enumerate(new_data)])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO parameters (block, section, name, position, info) VALUES (?, ?, ?, ?, ?)",
+                rows)
+            self.connection.executemany(
+                "DELETE FROM parameters WHERE block = ? AND section = ? AND name = ?",
+                [(block_key, section, name) for section, name in stored])
+
+        self.data[block_key] = copy.deepcopy(new_data)
+        if block_key == self.block_key:
+            self.block = self.data[block_key]
+        # re-index only the written and deleted parameters, not the whole block
+        for _, section, name, _, _ in rows:
+            self.index.update(self.data, (block_key, section, name))
+        for section, name in stored:
+            self.index.update(self.data, (block_key, section, name))
+        self.notifyCallbacks()
+
+    def getParameter(self, block_key, section, name):
+        """
+        Read a single parameter directly from the database.
+
+        :param block_key: The block of the parameter.
+        :type block_key: str
+        :param section: The section of the parameter.
+        :type section: str
+        :param name: The name of the parameter.
+        :type name: str
+        :return: The parameter properties, or None if it does not exist.
+        :rtype: dict or None
+        """
+        row = self.connection.execute(
+            "SELECT info FROM parameters WHERE block = ? AND section = ? AND name = ?",
+            (block_key, section, name)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def setParameter(self, block_key, section, name, info):
+        """
+        Write a single parameter directly to the database.
+
+        :param block_key: The block of the parameter.
+        :type block_key: str
+        :param section: The section of the parameter.
+        :type section: str
+        :param name: The name of the parameter.
+        :type name: str
+        :param info: The parameter properties.
+        :type info: dict
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO blocks (block, position) "
+                "VALUES (?, (SELECT COUNT(*) FROM blocks))", (block_key,))
+            self.connection.execute(
+                "INSERT OR IGNORE INTO sections (block, section, position) "
+                "VALUES (?, ?, (SELECT COUNT(*) FROM sections WHERE block = ?))", (block_key, section, block_key))
+            updated = self.connection.execute(
+                "UPDATE parameters SET info = ? WHERE block = ? AND section = ? AND name = ?",
+                (json.dumps(info), block_key, section, name)).rowcount
+            if not updated:
+                self.connection.execute(
+                    "INSERT INTO parameters (block, section, name, position, info) "
+                    "VALUES (?, ?, ?, (SELECT COUNT(*) FROM parameters WHERE block = ? AND section = ?), ?)",
+                    (block_key, section, name, block_key, section, json.dumps(info)))
+
+        if block_key in self.data:
+            self.data[block_key].setdefault(section, {})[name] = copy.deepcopy(info)
+            self.index.update(self.data, (block_key, section, name))
+        self.notifyCallbacks()
+
+    def importJson(self, filename):
+        """
+        Replace the content of the database with a settings JSON file.
+
+        Top level entries that are not blocks, such as the schema version, are kept in the metadata table.
+
+        :param filename: The name of the JSON file.
+        :type filename: str
+        """
+        with openSettingsFile(filename) as f:
+            full_data = loadSettings(f)
+        metadata = {key: value for key, value in full_data.items() if not isinstance(value, dict)}
+        full_data = {block: block_data for block, block_data in full_data.items() if isinstance(block_data, dict)}
+
+        with self.connection:
+            self.connection.execute("DELETE FROM blocks")
+            self.connection.execute("DELETE FROM sections")
+            self.connection.execute("DELETE FROM parameters")
+            self.connection.execute("DELETE FROM metadata")
+            self.connection.executemany(
+                "INSERT INTO metadata (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in metadata.items()])
+            self.connection.executemany(
+                "INSERT INTO blocks (block, position) VALUES (?, ?)",
+                [(block, position) for position, block in enumerate(full_data)])
+            self.connection.executemany(
+                "INSERT INTO sections (block, section, position) VALUES (?, ?, ?)",
+                [(block, section, position)
+                 for block, block_data in full_data.items()
+                 for position, section in enumerate(block_data)])
+            self.connection.executemany(
+                "INSERT INTO parameters (block, section, name, position, info) VALUES (?, ?, ?, ?, ?)",
+                [(block, section, name, position, json.dumps(info))
+                 for block, block_data in full_data.items()
+                 for section, params_dict in block_data.items()
+                 for position, (name, info) in enumerate(params_dict.items())])
+
+        self.data = {}
+        self._indexed_all = False
+        self.load()
+
+    def exportJson(self, filename):
+        """
+        Write the content of the database to a settings JSON file, including the metadata.
+
+        :param filename: The name of the JSON file.
+        :type filename: str
+        """
+        full_data = self.readBlocks()
+        full_data.update(self.readMetadata())
+        with openSettingsFile(filename, 'w') as f:
+            dumpSettings(full_data, f, filename)
+
+    def readMetadata(self):
+        """
+        Read the top level entries that are not blocks.
+
+        :return: The metadata, keyed by name.
+        :rtype: dict
+        """
+        return {key: json.loads(value) for key, value in self.connection.execute("SELECT key, value FROM metadata")}
+
+    def schemaVersion(self):
+        """
+        Get the schema version of the imported settings, see migrations.Migrator.
+
+        :return: The schema version, 0 if none was imported.
+        :rtype: int
+        """
+        return self.readMetadata().get(VERSION_KEY, 0)
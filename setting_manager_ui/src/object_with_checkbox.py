@@ -9,8 +9,11 @@ try:
         QDoubleSpinBox,
         QSizePolicy,
         QLineEdit,
-        QComboBox
+        QComboBox,
+        QCompleter
     )
+    from PySide6.QtCore import Qt, QStringListModel
+    from PySide6.QtGui import QColor, QPainter
 except ImportError:
     from qgis.PyQt.QtWidgets import (
         QWidget,
@@ -22,8 +25,74 @@ except ImportError:
         QDoubleSpinBox,
         QSizePolicy,
         QLineEdit,
-        QComboBox
+        QComboBox,
+        QCompleter
     )
+    from qgis.PyQt.QtCore import Qt, QStringListModel
+    from qgis.PyQt.QtGui import QColor, QPainter
+
+# option lists with more items than this get an editable combo box with a filtering completer
+COMPLETER_THRESHOLD = 50
+
+# shared option models, keyed by the tuple of options
+_option_models = {}
+
+
+def sharedOptionModel(options):
+    """
+    Gets the model for a list of dropdown options, shared by all combo boxes with the same options.
+
+    :param options: The dropdown options.
+    :type options: list of str
+    :return: The shared model.
+    :rtype: QStringListModel
+    """
+    key = tuple(options)
+    model = _option_models.get(key)
+    if model is None:
+        model = QStringListModel(list(key))
+        _option_models[key] = model
+    return model
+
+
+class ColorSwatchButton(QPushButton):
+    """
+    A push button that paints a color swatch on top of itself.
+
+    The swatch is painted directly instead of using a style sheet, so color buttons do not need their own
+    style sheet to be parsed and polished.
+
+    :param color: The color of the swatch.
+    :type color: str
+    :param parent: The parent widget.
+    :type parent: QWidget, optional
+    """
+    # margin between the button frame and the swatch, in pixels
+    SWATCH_MARGIN = 4
+
+    def __init__(self, color, parent=None):
+        super().__init__(parent)
+        self.swatch_color = QColor(color)
+
+    def setSwatchColor(self, color):
+        """
+        Sets the color of the swatch.
+
+        :param color: The new color.
+        :type color: str
+        """
+        self.swatch_color = QColor(color)
+        self.update()
+
+    def paintEvent(self, event):
+        """ Paints the button and the swatch. """
+        super().paintEvent(event)
+        if not self.swatch_color.isValid():
+            return
+        painter = QPainter(self)
+        margin = self.SWATCH_MARGIN
+        painter.fillRect(self.rect().adjusted(margin, margin, -margin, -margin), self.swatch_color)
+        painter.end()
 
 
 class ColorPicker(QWidget):
@@ -39,8 +108,7 @@ class ColorPicker(QWidget):
         super().__init__(parent)
         self.color = initial_color
         self.layout = QHBoxLayout(self)
-        self.button = QPushButton()
-        self.button.setStyleSheet(f"background-color: {self.color}")
+        self.button = ColorSwatchButton(self.color)
         self.button.clicked.connect(self.openColorDialog)
         self.layout.addWidget(self.button)
         self.setLayout(self.layout)
@@ -49,8 +117,7 @@ class ColorPicker(QWidget):
         """ Opens a color dialog to select a new color. """
         color = QColorDialog.getColor()
         if color.isValid():
-            self.color = color.name()
-            self.button.setStyleSheet(f"background-color: {self.color}")
+            self.setColor(color.name())
 
     def getColor(self):
         """
@@ -69,7 +136,7 @@ class ColorPicker(QWidget):
         :type color: str
         """
         self.color = color
-        self.button.setStyleSheet(f"background-color: {self.color}")
+        self.button.setSwatchColor(self.color)
 
 
 class ObjectWithCheckbox(QWidget):
@@ -286,11 +353,39 @@ class ComboBoxWithCheckbox(ObjectWithCheckbox):
     :type parent: QWidget, optional
     """
     def __init__(self, value, flag, checkbox=False, options=[], parent=None):
+        self.shared_model = False
         super().__init__(value, flag, checkbox, parent)
         if len(options) > 0:
-            self.addItems(options)
+            self.setOptions(options)
             self.setCurrentText(value)
 
+    def setOptions(self, options):
+        """
+        Sets the items of the QComboBox to a model shared with all combo boxes that have the same options.
+
+        Long option lists get an editable QComboBox with a completer that filters the options while typing.
+
+        :param options: The options to be set.
+        :type options: list of str
+        """
+        model = sharedOptionModel(options)
+        self.wobject.setModel(model)
+        self.shared_model = True
+        if model.rowCount() > COMPLETER_THRESHOLD:
+            self.wobject.setEditable(True)
+            self.wobject.setInsertPolicy(QComboBox.NoInsert)
+            completer = QCompleter(model, self.wobject)
+            completer.setCaseSensitivity(Qt.CaseInsensitive)
+            completer.setFilterMode(Qt.MatchContains)
+            completer.setCompletionMode(QCompleter.PopupCompletion)
+            self.wobject.setCompleter(completer)
+            self.wobject.lineEdit().editingFinished.connect(self.revertInvalidText)
+
+    def revertInvalidText(self):
+        """ Restores the text of the current item if the typed text is not one of the options. """
+        if self.wobject.findText(self.wobject.currentText()) == -1:
+            self.wobject.setEditText(self.wobject.itemText(self.wobject.currentIndex()))
+
     def addItems(self, items):
         """
         Adds items to the QComboBox.
@@ -298,6 +393,10 @@ class ComboBoxWithCheckbox(ObjectWithCheckbox):
         :param items: The items to be added.
         :type items: list of str
         """
+        if self.shared_model:
+            # do not change the options of the other combo boxes
+            self.wobject.setModel(QStringListModel(self.wobject.model().stringList(), self.wobject))
+            self.shared_model = False
         self.wobject.addItems(items)
 
     def setCurrentText(self, text):
@@ -307,11 +406,17 @@ class ComboBoxWithCheckbox(ObjectWithCheckbox):
         :param text: The text to be set.
         :type text: str
         """
-        self.wobject.setCurrentText(text)
+        # an editable QComboBox would only change the edit text, not the selected item
+        index = self.wobject.findText(text)
+        if index != -1:
+            self.wobject.setCurrentIndex(index)
+        else:
+            self.wobject.setCurrentText(text)
 
     def addObject(self):
         """ Adds a QComboBox as the main widget. """
         self.wobject = QComboBox()
+        self.wobject.view().setUniformItemSizes(True)
 
     def setValue(self, value):
         """
@@ -320,7 +425,7 @@ class ComboBoxWithCheckbox(ObjectWithCheckbox):
         :param value: The text to be set.
         :type value: str
         """
-        self.wobject.setCurrentText(value)
+        self.setCurrentText(value)
 
     def getValue(self):
         """
@@ -0,0 +1,31 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+# make the setting_manager_ui package importable when running pytest from any directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_JSON = os.path.join(os.path.dirname(__file__), "test.json")
+BLOCK = "test setting"
+SECTION = "Setting block 1"
+
+
+def readJson(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def writeJson(filename, data):
+    with open(filename, "w") as f:
+        json.dump(data, f)
+
+
+@pytest.fixture
+def settings_file(tmp_path):
+    """ A copy of test.json that the test may change. """
+    filename = str(tmp_path / "settings.json")
+    shutil.copy(TEST_JSON, filename)
+    return filename
@@ -0,0 +1,46 @@
+import copy
+
+import pytest
+
+from conftest import BLOCK, SECTION
+from setting_manager_ui.accessors import createAccessor, generateAccessorClass, releaseAccessor
+from setting_manager_ui.json_settings import JsonSettings
+
+
+@pytest.fixture
+def settings(settings_file):
+    return JsonSettings(settings_file, BLOCK)
+
+
+def test_values_match_get(settings):
+    cfg = createAccessor(settings)
+    for name, attribute in [("test_int", "test_int"), ("test string", "test_string"),
+                            ("dropdown test", "dropdown_test"), ("test float2", "test_float2")]:
+        assert getattr(cfg.Setting_block_1, attribute) == settings.get([SECTION, name])
+
+
+def test_refreshed_on_save(settings):
+    cfg = createAccessor(settings)
+    section = cfg.Setting_block_1
+
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = ""
+    settings.save(BLOCK, block)
+    assert section.test_int == ""
+
+    releaseAccessor(settings, cfg)
+    assert settings.callbacks == []
+    block[SECTION]["test_int"]["value"] = 3
+    settings.save(BLOCK, block)
+    assert section.test_int == ""
+
+
+def test_slots(settings):
+    cfg = createAccessor(settings)
+    with pytest.raises(AttributeError):
+        cfg.Setting_block_1.unknown = 1
+
+
+def test_name_collision():
+    with pytest.raises(ValueError):
+        generateAccessorClass({"section": {"test float": {}, "test_float": {}}})
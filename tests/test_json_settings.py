@@ -0,0 +1,121 @@
+import copy
+import gzip
+import io
+import json
+import os
+
+import pytest
+
+from conftest import BLOCK, SECTION, TEST_JSON, readJson, writeJson
+from setting_manager_ui import json_settings
+from setting_manager_ui.json_settings import JsonSettings, loadSettings
+
+
+def test_unchanged_load_returns_cached_view(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+    assert settings.load() is settings.load()
+    assert settings.load() is settings.data[BLOCK]
+
+
+def test_later_changes_to_saved_data_are_not_saved(tmp_path):
+    filename = str(tmp_path / "settings.json")
+    writeJson(filename, {"b1": {"s": {"p": {"value": 1}}}, "b2": {"s": {"p": {"value": 1}}}})
+    settings = JsonSettings(filename)
+
+    data = copy.deepcopy(settings.load())
+    data["b1"]["s"]["p"]["value"] = 2
+    settings.save("b1", data["b1"])
+    data["b1"]["s"]["p"]["value"] = 999
+    data["b2"]["s"]["p"]["value"] = 3
+    settings.save("b2", data["b2"])
+
+    assert readJson(filename) == {"b1": {"s": {"p": {"value": 2}}}, "b2": {"s": {"p": {"value": 3}}}}
+    assert settings.data["b1"]["s"]["p"]["value"] == 2
+
+
+def test_layers_are_not_changed_by_merging(tmp_path):
+    defaults = str(tmp_path / "defaults.json")
+    user = str(tmp_path / "user.json")
+    writeJson(defaults, {"blk": {"sec": {"p": {"value": 1, "default": 1}}, "other": {"q": {"value": 1}}}})
+    writeJson(user, {"blk": {"sec": {"p": {"value": 2}}}})
+    settings = JsonSettings(user, "blk", base_files=[defaults])
+
+    writeJson(user, {"blk": {"sec": {"p": {"value": 3}}}})
+    settings.load()
+    assert settings.get(["sec", "p"]) == 3
+    assert settings._layers[0] == readJson(defaults)
+
+
+def test_save_and_reload(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = 9
+    settings.save(BLOCK, block)
+
+    assert readJson(settings_file)[BLOCK][SECTION]["test_int"]["value"] == 9
+    assert JsonSettings(settings_file, BLOCK).get([SECTION, "test_int"]) == 9
+
+
+def test_external_rewrite_with_same_size_is_detected(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+    with open(settings_file) as f:
+        data = json.load(f)
+    data[BLOCK][SECTION]["test_int"]["value"] = 5
+    with open(settings_file, "w") as f:
+        json.dump(data, f, indent=4)
+
+    settings.load()
+    assert settings.get([SECTION, "test_int"]) == 5
+
+
+def test_layers_are_merged_and_only_user_layer_is_saved(tmp_path):
+    defaults = str(tmp_path / "defaults.json")
+    site = str(tmp_path / "site.json")
+    user = str(tmp_path / "user.json")
+    writeJson(defaults, {"blk": {"sec": {
+        "p": {"type": "int", "value": 1, "default": 1},
+        "q": {"type": "string", "value": "a", "default": "a"},
+    }}})
+    writeJson(site, {"blk": {"sec": {"q": {"default": "site"}}}})
+
+    settings = JsonSettings(user, "blk", base_files=[defaults, site])
+    assert settings.getDefault(["sec", "q"]) == "site"
+    assert not os.path.exists(user)
+
+    block = copy.deepcopy(settings.load())
+    block["sec"]["p"]["value"] = 5
+    settings.save("blk", block)
+
+    assert readJson(user) == {"blk": {"sec": {"p": {"value": 5}}}}
+    assert settings.get(["sec", "p"]) == 5
+
+    block = copy.deepcopy(settings.load())
+    block["sec"]["p"]["value"] = 1
+    settings.save("blk", block)
+    assert readJson(user) == {}
+
+
+def test_load_settings_in_small_chunks(monkeypatch):
+    monkeypatch.setattr(json_settings._StreamDecoder, "CHUNK_SIZE", 3)
+    with open(TEST_JSON) as f:
+        text = f.read()
+    assert loadSettings(io.StringIO(text)) == json.loads(text)
+
+    text = '{"b": {"s": {"p": {"value": 12345, "range": [-1.5e3, 2]}}, "t": {}}, "_schema_version": 10}'
+    assert loadSettings(io.StringIO(text)) == json.loads(text)
+    for invalid in ['{"b": 1,}', '{"b" 1}', '{"b": {"s": 1}', '{"b": 1} {}', '']:
+        with pytest.raises(json.JSONDecodeError):
+            loadSettings(io.StringIO(invalid))
+
+
+def test_compressed_file(tmp_path):
+    filename = str(tmp_path / "settings.json.gz")
+    with open(TEST_JSON) as source, gzip.open(filename, "wt") as f:
+        f.write(source.read())
+    settings = JsonSettings(filename, BLOCK)
+
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = 9
+    settings.save(BLOCK, block)
+    with gzip.open(filename, "rt") as f:
+        assert json.load(f)[BLOCK][SECTION]["test_int"]["value"] == 9
@@ -0,0 +1,163 @@
+import copy
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import BLOCK, SECTION, TEST_JSON, readJson, writeJson
+from setting_manager_ui.json_settings import VERSION_KEY, JsonSettings
+from setting_manager_ui.migrations import (
+    AddParameter,
+    Migration,
+    Migrator,
+    MoveParameter,
+    MoveSection,
+    RemoveParameter,
+    RenameParameter,
+    SetAttributes)
+from setting_manager_ui.sqlite_settings import SqliteSettings
+
+@pytest.fixture
+def migrator():
+    return Migrator([
+        Migration(2, [MoveSection(BLOCK, "Setting block 2", "global setting", "moved")]),
+        Migration(1, [RenameParameter(BLOCK, SECTION, "test_int", "count"),
+                      SetAttributes(BLOCK, SECTION, "count", range=[0, 10], advanced=True),
+                      AddParameter(BLOCK, SECTION, "new", {"type": "bool", "value": True, "default": True}),
+                      RemoveParameter(BLOCK, SECTION, "test_bool")]),
+    ])
+
+
+def test_migrate_stamps_version(migrator):
+    data = readJson(TEST_JSON)
+    assert migrator.migrate(data)
+
+    assert data[VERSION_KEY] == 2
+    params = data[BLOCK][SECTION]
+    assert "test_int" not in params and "test_bool" not in params
+    assert params["count"]["value"] == 4
+    assert params["count"]["range"] == [0, 10]
+    # renamed in place, right after "test float2" now that "test_bool" is removed
+    assert list(params)[list(params).index("test float2") + 1] == "count"
+    assert data["global setting"]["moved"] == readJson(TEST_JSON)[BLOCK]["Setting block 2"]
+
+
+def test_migrate_is_idempotent(migrator):
+    data = readJson(TEST_JSON)
+    migrator.migrate(data)
+    migrated = json.loads(json.dumps(data))
+
+    assert not migrator.migrate(data)
+    assert data == migrated
+
+
+def test_newer_file_is_rejected(migrator):
+    with pytest.raises(ValueError):
+        migrator.migrate({VERSION_KEY: 3})
+
+
+def test_migrate_file_dry_run(migrator, settings_file):
+    diff = migrator.migrateFile(settings_file, dry_run=True)
+    assert '"count"' in diff
+    assert readJson(settings_file) == readJson(TEST_JSON)
+
+    assert migrator.migrateFile(settings_file) == diff
+    assert readJson(settings_file)[VERSION_KEY] == 2
+    assert migrator.migrateFile(settings_file) == ""
+
+
+def test_migrate_directory(migrator, tmp_path):
+    for i in range(4):
+        shutil.copy(TEST_JSON, str(tmp_path / f"settings{i}.json"))
+    with open(TEST_JSON) as source, gzip.open(str(tmp_path / "settings.json.gz"), "wt") as f:
+        f.write(source.read())
+    invalid = str(tmp_path / "invalid.json")
+    with open(invalid, "w") as f:
+        f.write("{")
+
+    diffs, errors = migrator.migrateDirectory(str(tmp_path), max_workers=2)
+    assert len(diffs) == 5
+    assert str(tmp_path / "settings.json.gz") in diffs
+    assert list(errors) == [invalid]
+    assert isinstance(errors[invalid], json.JSONDecodeError)
+    diffs, errors = migrator.migrateDirectory(str(tmp_path), max_workers=2)
+    assert diffs == {}
+    assert list(errors) == [invalid]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp")]
+
+
+def test_move_into_existing_section():
+    data = {"blk": {"old": {"a": {"value": 1}}, "new": {"b": {"value": 2}}}}
+    MoveSection("blk", "old", "blk", "new").apply(data)
+    assert data == {"blk": {"new": {"b": {"value": 2}, "a": {"value": 1}}}}
+
+    data = {"blk": {"old": {"a": {"value": 1}}, "new": {"a": {"value": 2}}}}
+    with pytest.raises(ValueError):
+        MoveSection("blk", "old", "blk", "new").apply(data)
+    with pytest.raises(ValueError):
+        MoveParameter("blk", "old", "a", "blk", "new").apply(data)
+    assert data == {"blk": {"old": {"a": {"value": 1}}, "new": {"a": {"value": 2}}}}
+
+
+def test_migrate_on_load(migrator, settings_file):
+    settings = JsonSettings(settings_file, BLOCK, migrator=migrator)
+    assert settings.get([SECTION, "count"]) == 4
+    assert readJson(settings_file)[VERSION_KEY] == 2
+
+
+def test_new_user_layer_is_stamped(tmp_path):
+    defaults = str(tmp_path / "defaults.json")
+    user = str(tmp_path / "user.json")
+    writeJson(defaults, {"blk": {"s": {
+        "a": {"type": "int", "value": 1, "default": 1},
+        "c": {"type": "int", "value": 2, "default": 2},
+    }}})
+    # renames "a" to "b", then "c" to "a": running both again on migrated data would shuffle the values
+    migrator = Migrator([
+        Migration(1, [RenameParameter("blk", "s", "a", "b")]),
+        Migration(2, [RenameParameter("blk", "s", "c", "a")]),
+    ])
+
+    settings = JsonSettings(user, "blk", base_files=[defaults], migrator=migrator)
+    block = copy.deepcopy(settings.load())
+    block["s"]["a"]["value"] = 100
+    settings.save("blk", block)
+    assert readJson(user)[VERSION_KEY] == 2
+
+    settings = JsonSettings(user, "blk", base_files=[defaults], migrator=migrator)
+    assert settings.get(["s", "a"]) == 100
+    assert settings.get(["s", "b"]) == 1
+
+
+def test_definitions_are_not_added_to_user_layer(tmp_path):
+    defaults = str(tmp_path / "defaults.json")
+    user = str(tmp_path / "user.json")
+    writeJson(defaults, {VERSION_KEY: 1, "blk": {"s": {
+        "a": {"type": "int", "value": 1, "default": 1},
+        "n": {"type": "int", "value": 7, "default": 7, "range": [0, 10]},
+    }}})
+    writeJson(user, {"blk": {"s": {"a": {"value": 2}}}})
+    migrator = Migrator([
+        Migration(1, [AddParameter("blk", "s", "n", {"type": "int", "value": 5, "default": 5}),
+                      SetAttributes("blk", "s", "a", range=[0, 3])]),
+    ])
+
+    settings = JsonSettings(user, "blk", base_files=[defaults], migrator=migrator)
+    assert readJson(user) == {VERSION_KEY: 1, "blk": {"s": {"a": {"value": 2}}}}
+    assert settings.get(["s", "n"]) == 7
+    assert settings.get(["s", "a"]) == 2
+
+
+def test_sqlite_round_trip_keeps_version(migrator, settings_file, tmp_path):
+    migrator.migrateFile(settings_file)
+    settings = SqliteSettings(str(tmp_path / "settings.db"))
+    settings.importJson(settings_file)
+    assert settings.schemaVersion() == 2
+
+    exported = str(tmp_path / "exported.json")
+    settings.exportJson(exported)
+    settings.close()
+    assert readJson(exported) == readJson(settings_file)
+    assert migrator.migrateFile(exported) == ""
@@ -0,0 +1,124 @@
+import copy
+import json
+import timeit
+
+import pytest
+
+from conftest import BLOCK, SECTION, TEST_JSON
+from setting_manager_ui.json_settings import JsonSettings, SettingsIndex
+from setting_manager_ui.sqlite_settings import SqliteSettings
+
+
+def test_query(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+
+    assert settings.query(advanced=True) == {(BLOCK, SECTION, "dropdown test"), (BLOCK, SECTION, "test string")}
+    assert settings.query(block=BLOCK, type="int") == {(BLOCK, SECTION, "test_int"),
+                                                      (BLOCK, "Setting block 2", "test int")}
+    assert settings.query(auto=True) == {(BLOCK, SECTION, "dropdown test")}
+    assert settings.query(modified=True) == set()
+    with pytest.raises(ValueError):
+        settings.query(unknown=True)
+
+
+def test_index_follows_save(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = 9
+    settings.save(BLOCK, block)
+    assert settings.query(modified=True) == {(BLOCK, SECTION, "test_int")}
+
+    del block[SECTION]["test_int"]
+    settings.save(BLOCK, block)
+    assert settings.query(modified=True) == set()
+    assert (BLOCK, SECTION, "test_int") not in settings.query(type="int")
+
+
+def test_save_reindexes_only_changed_parameters(settings_file, monkeypatch):
+    settings = JsonSettings(settings_file, BLOCK)
+    paths = []
+    update = settings.index.update
+    monkeypatch.setattr(settings.index, "update", lambda data, path=(): paths.append(path) or update(data, path))
+
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = 9
+    del block["Setting block 2"]["title"]
+    settings.save(BLOCK, block)
+    assert paths == [(BLOCK, SECTION, "test_int"), (BLOCK, "Setting block 2", "title")]
+    assert settings.query(modified=True) == {(BLOCK, SECTION, "test_int")}
+    assert (BLOCK, "Setting block 2", "title") not in settings.query()
+
+
+def test_sqlite_indexes_blocks_that_are_not_loaded(tmp_path):
+    settings = SqliteSettings(str(tmp_path / "settings.db"))
+    settings.importJson(TEST_JSON)
+    settings.close()
+
+    settings = SqliteSettings(str(tmp_path / "settings.db"), "other setting")
+    assert BLOCK not in settings.data
+    assert settings.query(block=BLOCK, type="int") == {(BLOCK, SECTION, "test_int"),
+                                                      (BLOCK, "Setting block 2", "test int")}
+
+    block = copy.deepcopy(settings.load(BLOCK))
+    block[SECTION]["test_int"]["value"] = 9
+    settings.save(BLOCK, block)
+    assert settings.query(modified=True) == {(BLOCK, SECTION, "test_int")}
+    settings.close()
+
+
+def test_unsaved_changes_do_not_affect_index(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = 999
+
+    settings.load()
+    assert settings.query(modified=True) == set()
+
+
+def test_index_follows_external_changes_on_load(settings_file):
+    settings = JsonSettings(settings_file, BLOCK)
+    with open(settings_file) as f:
+        data = json.load(f)
+    data[BLOCK][SECTION]["test float"]["value"] = 0.5
+    data[BLOCK]["Setting block 2"]["title"]["advanced"] = True
+    with open(settings_file, "w") as f:
+        json.dump(data, f)
+
+    settings.load()
+    assert settings.query(modified=True) == {(BLOCK, SECTION, "test float")}
+    assert (BLOCK, "Setting block 2", "title") in settings.query(advanced=True)
+
+
+def test_partial_update():
+    data = {"blk": {"sec": {
+        "p": {"type": "int", "value": 1, "default": 1},
+        "q": {"type": "float", "value": 1.0, "default": 2.0},
+    }}}
+    index = SettingsIndex()
+    index.update(data)
+    assert index.query(modified=True) == {("blk", "sec", "q")}
+
+    data["blk"]["sec"]["p"]["value"] = 2
+    index.update(data, ("blk", "sec", "p"))
+    assert index.query(modified=True) == {("blk", "sec", "p"), ("blk", "sec", "q")}
+
+    del data["blk"]["sec"]
+    index.update(data, ("blk", "sec"))
+    assert index.query() == set()
+    assert index.entries == {}
+
+
+def test_query_is_fast_on_large_files(tmp_path):
+    filename = str(tmp_path / "large.json")
+    data = {f"block{b}": {f"section{s}": {f"param{p}": {
+        "type": "int", "value": p, "default": p if p % 100 else -1, "advanced": p % 2 == 0,
+    } for p in range(500)} for s in range(10)} for b in range(4)}
+    with open(filename, "w") as f:
+        json.dump(data, f)
+    settings = JsonSettings(filename)
+
+    assert len(settings.query(block="block0", modified=True, advanced=True)) == 50
+    # the best of several runs, so a busy machine does not fail the test
+    duration = min(timeit.repeat(lambda: settings.query(block="block0", modified=True, advanced=True),
+                                 number=1, repeat=20))
+    assert duration < 0.001
@@ -0,0 +1,59 @@
+import copy
+
+import pytest
+
+from conftest import BLOCK, SECTION
+from setting_manager_ui.json_settings import JsonSettings
+from setting_manager_ui.shared_settings import HEADER, SettingsPublisher, SettingsSubscriber
+
+
+@pytest.fixture
+def settings(settings_file):
+    return JsonSettings(settings_file, BLOCK)
+
+
+@pytest.fixture
+def publisher(settings):
+    publisher = SettingsPublisher(settings, size=HEADER.size + 4096)
+    yield publisher
+    publisher.close()
+
+
+def test_subscriber_follows_saves(settings, publisher):
+    subscriber = SettingsSubscriber(publisher.name, BLOCK)
+    assert subscriber.get([SECTION, "test_int"]) == 4
+    assert not subscriber.poll()
+
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["test_int"]["value"] = 42
+    settings.save(BLOCK, block)
+
+    assert subscriber.poll()
+    assert subscriber.get([SECTION, "test_int"]) == 42
+    subscriber.close()
+
+
+def test_snapshot_outgrowing_the_block_moves_to_next_generation(settings, publisher):
+    subscriber = SettingsSubscriber(publisher.name, BLOCK)
+
+    block = copy.deepcopy(settings.load())
+    block[SECTION]["large"] = {"type": "dropdown", "value": "a", "options": ["option %d" % i for i in range(5000)]}
+    settings.save(BLOCK, block)
+
+    assert publisher.generation == 1
+    assert subscriber.poll()
+    assert subscriber.generation == 1
+    assert len(subscriber.block[SECTION]["large"]["options"]) == 5000
+
+    late_subscriber = SettingsSubscriber(publisher.name, BLOCK)
+    assert late_subscriber.get([SECTION, "large"]) == "a"
+    late_subscriber.close()
+    subscriber.close()
+
+
+def test_torn_snapshot_times_out(publisher):
+    subscriber = SettingsSubscriber(publisher.name, BLOCK, timeout=0.05)
+    HEADER.pack_into(publisher.shm.buf, 0, publisher.version + 1, 0, 0)
+    with pytest.raises(TimeoutError):
+        subscriber.poll()
+    subscriber.close()
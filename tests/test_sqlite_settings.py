@@ -0,0 +1,58 @@
+import copy
+
+import pytest
+
+from conftest import BLOCK, SECTION, TEST_JSON, readJson
+from setting_manager_ui.sqlite_settings import SqliteSettings
+
+
+@pytest.fixture
+def settings(tmp_path):
+    settings = SqliteSettings(str(tmp_path / "settings.db"))
+    settings.importJson(TEST_JSON)
+    yield settings
+    settings.close()
+
+
+def test_wal_mode(settings):
+    assert settings.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_import_export_round_trip(settings, tmp_path):
+    exported = str(tmp_path / "exported.json")
+    settings.exportJson(exported)
+
+    original = readJson(TEST_JSON)
+    round_trip = readJson(exported)
+    assert round_trip == original
+    assert list(round_trip[BLOCK][SECTION]) == list(original[BLOCK][SECTION])
+
+
+def test_save_block(settings, tmp_path):
+    block = copy.deepcopy(settings.load(BLOCK))
+    block[SECTION]["test_int"]["value"] = 7
+    del block[SECTION]["test_bool"]
+    settings.save(BLOCK, block)
+
+    reopened = SqliteSettings(settings.filename, BLOCK)
+    assert reopened.get([SECTION, "test_int"]) == 7
+    assert reopened.getParameter(BLOCK, SECTION, "test_bool") is None
+    reopened.close()
+
+
+def test_set_parameter(settings):
+    settings.load(BLOCK)
+    settings.setParameter(BLOCK, "new section", "x", {"type": "int", "value": 1})
+
+    assert settings.getParameter(BLOCK, "new section", "x") == {"type": "int", "value": 1}
+    assert list(settings.load(BLOCK))[-1] == "new section"
+
+
+def test_later_changes_to_saved_data_are_not_kept(settings):
+    block = copy.deepcopy(settings.load(BLOCK))
+    block[SECTION]["test_int"]["value"] = 7
+    settings.save(BLOCK, block)
+    block[SECTION]["test_int"]["value"] = 999
+
+    assert settings.get([SECTION, "test_int"]) == 7
+    assert settings.load(BLOCK)[SECTION]["test_int"]["value"] == 7
@@ -23,7 +23,11 @@ def main():
     # List of files to update with version information
     files_to_update = [
         'setting_manager_ui/json_settings.py',
-        'setting_manager_ui/setting_ui.py'
+        'setting_manager_ui/setting_ui.py',
+        'setting_manager_ui/sqlite_settings.py',
+        'setting_manager_ui/accessors.py',
+        'setting_manager_ui/shared_settings.py',
+        'setting_manager_ui/migrations.py'
     ]
 
     for file_path in files_to_update: